@@ -1,6 +1,33 @@
+import numba
+import numpy as np
 import pandas as pd
 
-from pytradersan.constants import ACTIONS_STANDARD, TAX, TRANSACTIONS_STANDARD_COLS
+from pytradersan.constants import (
+    ACTIONS_STANDARD,
+    EPSILON,
+    TAX,
+    TRANSACTIONS_STANDARD_COLS,
+)
+
+# NaT dates become the minimum int64 once converted to integer days
+_NAT_DAYS = np.iinfo(np.int64).min
+
+
+def _money_to_float(values: pd.Series) -> pd.Series:
+    """Converts currency strings such as '$1,234.56' to floats."""
+    parsed = np.fromiter(
+        (
+            (
+                float(v.replace("$", "").replace(",", "") or "nan")
+                if isinstance(v, str)
+                else np.nan if pd.isna(v) else float(v)
+            )
+            for v in values.to_numpy()
+        ),
+        dtype=np.float64,
+        count=len(values),
+    )
+    return pd.Series(parsed, index=values.index, name=values.name)
 
 
 def standardize_transactions(
@@ -19,7 +46,7 @@ def standardize_transactions(
     """
     if platform.lower() == "schwab":
         # Standardize Schwab transactions
-        schwab = transactions.copy(deep=True)
+        schwab = transactions.copy(deep=False)
         schwab["account"] = account_name
         schwab_actions = {
             "Non-Qualified Div": "DIVIDEND",
@@ -33,20 +60,17 @@ def standardize_transactions(
             "Sell": "SELL",
             "Security Transfer": "TRANSFER",
         }
+        # Dates may carry an "as of" prefix; the trade date is the last 10 chars
         schwab["date"] = pd.to_datetime(schwab["Date"].str[-10:], format="%m/%d/%Y")
         schwab["action"] = schwab["Action"].map(schwab_actions)
         schwab["symbol"] = schwab["Symbol"]
         schwab["quantity"] = schwab["Quantity"]
-        schwab["price"] = (
-            schwab["Price"].str.replace("$", "").str.replace(",", "").astype(float)
-        )
-        schwab["amount"] = (
-            schwab["Amount"].str.replace("$", "").str.replace(",", "").astype(float)
-        )
+        schwab["price"] = _money_to_float(schwab["Price"])
+        schwab["amount"] = _money_to_float(schwab["Amount"])
         standardized_transactions = schwab[TRANSACTIONS_STANDARD_COLS]
     elif platform.lower() == "marcus":
         # Standardize Marcus Invest transactions
-        marcus = transactions.copy(deep=True)
+        marcus = transactions.copy(deep=False)
         marcus["account"] = account_name
         marcus_actions = {
             "A": "ACH",
@@ -61,18 +85,91 @@ def standardize_transactions(
         marcus["date"] = pd.to_datetime(marcus["Date"])
         marcus["symbol"] = marcus["Desc"]
         marcus["quantity"] = marcus["Quantity"]
-        marcus["Credit"] = (
-            marcus["Credit"].str.replace("$", "").str.replace(",", "").astype(float)
-        )
-        marcus["Debit"] = (
-            marcus["Debit"].str.replace("$", "").str.replace(",", "").astype(float)
-        )
-        marcus["amount"] = marcus["Credit"] - marcus["Debit"]
-        marcus["price"] = (
-            marcus["Price"].str.replace("$", "").str.replace(",", "").astype(float)
+        marcus["amount"] = _money_to_float(marcus["Credit"]) - _money_to_float(
+            marcus["Debit"]
         )
+        marcus["price"] = _money_to_float(marcus["Price"])
         standardized_transactions = marcus[TRANSACTIONS_STANDARD_COLS]
     else:
         raise ValueError(f"Unsupported platform: {platform}")
 
+    standardized_transactions = standardized_transactions.astype(
+        {"account": "category", "symbol": "category", "action": "category"}
+    )
     return standardized_transactions
+
+
+@numba.njit(cache=True)
+def fifo_match(symbol_codes, dates, quantity, price, amount, as_of_day, ltcg_days):
+    """
+    Matches sells against the oldest open buy lots (FIFO), per symbol, and
+    computes all derived trade columns in the same pass.
+
+    Trades must be sorted by symbol and date.
+
+    Args:
+        symbol_codes (np.ndarray): Integer code of the symbol of each trade.
+        dates (np.ndarray): Trade dates as integer days since epoch, with
+            missing dates (NaT) as the minimum int64.
+        quantity (np.ndarray): Signed quantity of each trade (sells are negative).
+        price (np.ndarray): Price of each trade.
+        amount (np.ndarray): Net amount of each trade.
+        as_of_day (int): Valuation date as integer days since epoch.
+        ltcg_days (float): Holding period after which a lot is long term.
+
+    Returns:
+        tuple: Arrays of holding period days (NaN for missing dates), amount
+            weighted holding days, long term flag, long term shares still held
+            from each lot, their cost and the cumulative quantity per symbol.
+    """
+    n = len(dates)
+    holding_days = np.empty(n, dtype=np.float64)
+    amount_holding_days = np.empty(n, dtype=np.float64)
+    ltcg_flag = np.empty(n, dtype=np.bool_)
+    ltcg_shares = np.zeros(n, dtype=np.float64)
+    ltcg_cost = np.zeros(n, dtype=np.float64)
+    cum_quantity = np.empty(n, dtype=np.float64)
+    open_shares = np.zeros(n, dtype=np.float64)
+    first_open_lot = 0
+    running_quantity = 0.0
+    for i in range(n):
+        if i == 0 or symbol_codes[i] != symbol_codes[i - 1]:
+            first_open_lot = i
+            running_quantity = 0.0
+        if dates[i] == _NAT_DAYS:
+            holding_days[i] = np.nan
+            amount_holding_days[i] = np.nan
+            ltcg_flag[i] = False
+        else:
+            holding_days[i] = as_of_day - dates[i]
+            amount_holding_days[i] = amount[i] * holding_days[i]
+            ltcg_flag[i] = holding_days[i] > ltcg_days
+        qty = quantity[i]
+        if np.isnan(qty):
+            cum_quantity[i] = np.nan
+            continue
+        running_quantity += qty
+        cum_quantity[i] = running_quantity
+        if qty > 0:
+            open_shares[i] = qty
+            continue
+        to_match = -qty
+        while to_match > EPSILON and first_open_lot < i:
+            matched = min(open_shares[first_open_lot], to_match)
+            open_shares[first_open_lot] -= matched
+            to_match -= matched
+            if open_shares[first_open_lot] <= EPSILON:
+                open_shares[first_open_lot] = 0.0
+                first_open_lot += 1
+    for i in range(n):
+        if ltcg_flag[i] and open_shares[i] > 0:
+            ltcg_shares[i] = open_shares[i]
+            ltcg_cost[i] = open_shares[i] * price[i]
+    return (
+        holding_days,
+        amount_holding_days,
+        ltcg_flag,
+        ltcg_shares,
+        ltcg_cost,
+        cum_quantity,
+    )
@@ -6,6 +6,7 @@ import pandas as pd
 import yfinance as yf
 
 from pytradersan import constants
+from pytradersan.helpers import fifo_match
 
 
 class Portfolio:
@@ -15,9 +16,18 @@ class Portfolio:
     """
 
     transaction_columns = constants.TRANSACTIONS_STANDARD_COLS
+    derived_columns = [
+        "holding_period_days",
+        "amount_holding_period_days",
+        "ltcg_flag",
+        "ltcg_shares",
+        "cum_quantity",
+        "ltcg_cost",
+    ]
     asset_classes = constants.ASSET_CLASSES_STANDARD
     tax = constants.TAX
     portfolio_price_data = None
+    _ticker_cache: Dict[str, yf.Ticker] = {}
 
     def __init__(
         self,
@@ -26,13 +36,13 @@ class Portfolio:
         as_of_date: str = None,
     ):
         # TODO: define process trades function. Easier to combine portfolios
-        self._trades = trades.copy(deep=True)
+        self._trades = trades.copy(deep=False)
+        self._snapshot = None
+        self._snapshot_dirty = True
         if price_data is not None:
             if self.__class__.portfolio_price_data is not None:
                 self.__class__.portfolio_price_data = (
-                    self.__class__.portfolio_price_data.combine_first(
-                        price_data.copy(deep=True)
-                    )
+                    self.__class__.portfolio_price_data.combine_first(price_data)
                 )
             else:
                 self.__class__.portfolio_price_data = price_data.copy(deep=True)
@@ -45,33 +55,60 @@ class Portfolio:
         self._process_trades()
         self.update_price_data()
         self._assign_price_data()
-        self._update_snapshot()
+        self._refresh_snapshot()
 
     def _process_trades(self):
-        self._trades["date"] = pd.to_datetime(self._trades["date"])
-        self._trades["holding_period_days"] = (
-            self.as_of_date - self._trades["date"]
-        ).dt.days
-        self._trades["amount_holding_period_days"] = (
-            self._trades["amount"] * self._trades["holding_period_days"]
-        )
-        self._trades["ltcg_flag"] = (
-            self._trades["holding_period_days"] > constants.DAYS_IN_A_YEAR
-        ).astype(int)
-        self._trades["ltcg_shares"] = (
-            self._trades["ltcg_flag"] * self._trades["quantity"]
+        self._snapshot_dirty = True
+        self._trades_frame = None
+        # Input trades may be shared with the caller, so only rebuild columns
+        self._trades = self._trades.drop(
+            columns=self.derived_columns, errors="ignore"
+        ).assign(
+            date=lambda trades: pd.to_datetime(trades["date"]),
+            symbol=lambda trades: trades["symbol"].astype("category"),
         )
         self._trades = self._trades.sort_values(
             by=["symbol", "date"], ascending=[True, True]
         ).reset_index(drop=True)
-        self._trades["cum_quantity"] = self._trades.groupby("symbol")[
-            "quantity"
-        ].cumsum()
-        self._trades["ltcg_cost"] = self._trades["ltcg_shares"] * self._trades["price"]
-        self._ltcg_lots = self._trades[self._trades.ltcg_flag == 1]
-        self._stcg_lots = self._trades[self._trades.ltcg_flag == 0]
-        self.symbols = self._trades.symbol.unique().tolist()
-        self.tickers = {symbol: yf.Ticker(symbol) for symbol in self.symbols}
+        # Hot path works on parallel numpy arrays; the user facing trades
+        # DataFrame is only assembled on demand in the trades property
+        symbol_codes, self._symbol_table = pd.factorize(self._trades["symbol"])
+        self._arr = {
+            "date": self._trades["date"]
+            .to_numpy()
+            .astype("datetime64[D]")
+            .astype(np.int64),
+            "quantity": self._trades["quantity"].to_numpy(dtype=np.float64),
+            "price": self._trades["price"].to_numpy(dtype=np.float64),
+            "amount": self._trades["amount"].to_numpy(dtype=np.float64),
+            "symbol_code": symbol_codes,
+        }
+        (
+            self._arr["holding_period_days"],
+            self._arr["amount_holding_period_days"],
+            self._arr["ltcg_flag"],
+            self._arr["ltcg_shares"],
+            self._arr["ltcg_cost"],
+            self._arr["cum_quantity"],
+        ) = fifo_match(
+            self._arr["symbol_code"],
+            self._arr["date"],
+            self._arr["quantity"],
+            self._arr["price"],
+            self._arr["amount"],
+            np.datetime64(self.as_of_date, "D").astype(np.int64),
+            constants.DAYS_IN_A_YEAR,
+        )
+        self.symbols = self._symbol_table.tolist()
+        self.tickers = {
+            symbol: self.__class__._get_ticker(symbol) for symbol in self.symbols
+        }
+
+    @classmethod
+    def _get_ticker(cls, symbol: str) -> yf.Ticker:
+        if symbol not in cls._ticker_cache:
+            cls._ticker_cache[symbol] = yf.Ticker(symbol)
+        return cls._ticker_cache[symbol]
 
     @classmethod
     def _download_price_data(cls, symbols, **kwargs):
@@ -79,6 +116,7 @@ class Portfolio:
             return None
         params = {}
         params["tickers"] = symbols
+        params["threads"] = True
         if not kwargs:
             params["period"] = "max"
         else:
@@ -105,51 +143,56 @@ class Portfolio:
             return (list(missing_symbols), max_available_date)
 
     def update_price_data(self) -> None:
+        self._snapshot_dirty = True
         missing_symbols, max_available_date = self._get_download_params()
+        # Each symbol is downloaded at most once: missing symbols get their full
+        # history, the remaining ones only the dates after max_available_date
+        downloads = []
         if missing_symbols:
-            # Get data for missing symbols first
             print(f"Getting data for missing symbols: {missing_symbols}")
-            new_symbols_price_data = self.__class__._download_price_data(
-                symbols=missing_symbols
+            downloads.append(
+                self.__class__._download_price_data(symbols=missing_symbols)
             )
-            print(f"Max date for new symbols: {new_symbols_price_data.index.max()}")
-            if self.__class__.portfolio_price_data is None:
-                self.__class__.portfolio_price_data = new_symbols_price_data.copy(
-                    deep=True
-                )
-            else:
-                self.__class__.portfolio_price_data = (
-                    self.__class__.portfolio_price_data.combine_first(
-                        new_symbols_price_data
-                    )
-                )
         else:
             print("No missing symbols found")
-        # Get data for missing dates
-        if max_available_date.strftime("%Y-%m-%d") < pd.Timestamp.now().strftime(
-            "%Y-%m-%d"
+        if (
+            max_available_date is not None
+            and max_available_date.normalize() < pd.Timestamp.now().normalize()
         ):
-            print(f"Getting data for missing dates from {max_available_date}")
-            data_for_missing_dates = self.__class__._download_price_data(
-                symbols=self.__class__.portfolio_price_data.columns.get_level_values(
-                    "Ticker"
-                )
+            available_symbols = (
+                self.__class__.portfolio_price_data.columns.get_level_values("Ticker")
                 .unique()
-                .tolist(),
-                start=max_available_date.strftime("%Y-%m-%d"),
-                end=pd.Timestamp.now().strftime("%Y-%m-%d"),
+                .tolist()
             )
-            self.__class__.portfolio_price_data = (
-                self.__class__.portfolio_price_data.combine_first(
-                    data_for_missing_dates
+            stale_symbols = [
+                symbol for symbol in available_symbols if symbol not in missing_symbols
+            ]
+            if stale_symbols:
+                print(f"Getting data for missing dates from {max_available_date}")
+                downloads.append(
+                    self.__class__._download_price_data(
+                        symbols=stale_symbols,
+                        start=max_available_date.strftime("%Y-%m-%d"),
+                        end=pd.Timestamp.now().strftime("%Y-%m-%d"),
+                    )
                 )
-            )
         else:
             print("Prices are up to date")
-        # Remove duplicates
-        self.__class__.portfolio_price_data = (
-            self.__class__.portfolio_price_data.T.drop_duplicates().T.drop_duplicates()
-        )  # This update is not working. Need to create a class method to do this
+        if downloads:
+            new_price_data = pd.concat(downloads, axis=1)
+            print(f"Max date for downloaded data: {new_price_data.index.max()}")
+            if self.__class__.portfolio_price_data is None:
+                self.__class__.portfolio_price_data = new_price_data
+            else:
+                self.__class__.portfolio_price_data = (
+                    self.__class__.portfolio_price_data.combine_first(new_price_data)
+                )
+        # Remove duplicate dates and columns, keeping the latest download
+        price_data = self.__class__.portfolio_price_data
+        self.__class__.portfolio_price_data = price_data.loc[
+            ~price_data.index.duplicated(keep="last"),
+            ~price_data.columns.duplicated(keep="last"),
+        ]
         print(
             f"Price data updated. New max date: {self.__class__.portfolio_price_data.index.max()}"
         )
@@ -166,51 +209,47 @@ class Portfolio:
             f"Max date for price data: {self.__class__.portfolio_price_data.index.max()}"
         )
         print(f"As of date: {self.as_of_date}")
-        self.prices = self.__class__.portfolio_price_data.T.loc[
-            (
-                self.__class__.portfolio_price_data.columns.get_level_values("Price")
-                == "Close"
-            )
-            & (
-                self.__class__.portfolio_price_data.columns.get_level_values(
-                    "Ticker"
-                ).isin(self.symbols)
-            )
-        ].T
-        self.volumes = self.__class__.portfolio_price_data.T.loc[
-            (
-                self.__class__.portfolio_price_data.columns.get_level_values("Price")
-                == "Volume"
-            )
-            & (
-                self.__class__.portfolio_price_data.columns.get_level_values(
-                    "Ticker"
-                ).isin(self.symbols)
-            )
-        ].T
-        self.prices.columns = self.prices.columns.droplevel("Price")
-        self.volumes.columns = self.volumes.columns.droplevel("Price")
-        self.prices = self.prices[
-            self.prices.index <= self.as_of_date.strftime("%Y-%m-%d")
+        columns = self.__class__.portfolio_price_data.columns
+        fields = columns.get_level_values("Price")
+        symbols_mask = columns.get_level_values("Ticker").isin(self.symbols)
+        self.prices = self.__class__.portfolio_price_data.loc[
+            :, (fields == "Close") & symbols_mask
         ]
-        self.volumes = self.volumes[
-            self.volumes.index <= self.as_of_date.strftime("%Y-%m-%d")
+        self.volumes = self.__class__.portfolio_price_data.loc[
+            :, (fields == "Volume") & symbols_mask
         ]
+        self.prices.columns = self.prices.columns.droplevel("Price")
+        self.volumes.columns = self.volumes.columns.droplevel("Price")
+        # Prices and volumes share the index of portfolio_price_data
+        dates_mask = self.prices.index <= self.as_of_date.normalize()
+        self.prices = self.prices[dates_mask]
+        self.volumes = self.volumes[dates_mask]
         self.current_prices = self.prices.loc[self.prices.index.max()].rename(
             "current_price"
         )
         return None
 
     def _update_snapshot(self):
-        self._positions = self._trades.groupby("symbol")[
-            [
-                "quantity",
-                "amount",
-                "amount_holding_period_days",
-                "ltcg_shares",
-                "ltcg_cost",
-            ]
-        ].sum()
+        columns = [
+            "quantity",
+            "amount",
+            "amount_holding_period_days",
+            "ltcg_shares",
+            "ltcg_cost",
+        ]
+        # Trades are already sorted by symbol in _process_trades, so each
+        # symbol is a contiguous block that can be summed with reduceat.
+        # Trades without a symbol (code -1) are excluded, like in groupby.
+        valid = self._arr["symbol_code"] >= 0
+        codes = self._arr["symbol_code"][valid]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        values = np.column_stack([self._arr[column][valid] for column in columns])
+        values = np.where(np.isnan(values), 0.0, values)
+        self._positions = pd.DataFrame(
+            np.add.reduceat(values, starts, axis=0),
+            index=pd.Index(self._symbol_table.to_numpy()[codes[starts]], name="symbol"),
+            columns=columns,
+        )
         self._positions = self._positions.rename(
             columns={
                 "quantity": "num_shares",
@@ -234,26 +273,44 @@ class Portfolio:
         self._positions["wtd_avg_holding_period_days"] = -(
             self._positions["wtd_holding_days"] / self._positions["cost_basis"]
         )
-        self._positions = self._positions.applymap(lambda x: round(x, 4))
+        self._positions = self._positions.round(4)
         return self._positions
 
+    def _refresh_snapshot(self):
+        positions = self._update_snapshot()
+        positions = positions.round(2)
+        self._snapshot = positions[positions["num_shares"].abs() >= 1]
+        self._snapshot_dirty = False
+
     @property
     def snapshot(self):
-        positions = self._update_snapshot()
-        positions = positions.applymap(lambda x: round(x, 2))
-        positions = positions[positions["num_shares"].abs() >= 1]
-        return positions
+        if self._snapshot_dirty or self._snapshot is None:
+            self._refresh_snapshot()
+        # Return a copy so callers cannot alter the cached snapshot
+        return self._snapshot.copy()
 
     @property
     def trades(self):
-        return self._trades
+        if self._trades_frame is None:
+            self._trades_frame = self._trades.assign(
+                **{column: self._arr[column] for column in self.derived_columns}
+            )
+        return self._trades_frame
+
+    @property
+    def _ltcg_lots(self):
+        return self.trades[self._arr["ltcg_flag"]]
+
+    @property
+    def _stcg_lots(self):
+        return self.trades[~self._arr["ltcg_flag"]]
 
     def get_upcoming_ltcg_lots(self, days: int = 7, symbols: list | str = None):
         print(
             f"""Getting lots crossing the Long Term Capital Gains threshold
               within the next {days} days"""
         )
-        lots = self._stcg_lots.copy(deep=True)
+        lots = self._stcg_lots
         lots = lots[lots.holding_period_days > (constants.DAYS_IN_A_YEAR - days)]
         if symbols:
             if isinstance(symbols, str):
@@ -270,7 +327,7 @@ class Portfolio:
         return lots
 
     def combine(self, new_portfolio, as_of_date=None):
-        self._trades = pd.concat([self._trades, new_portfolio.trades], axis=0)
+        self._trades = pd.concat([self._trades, new_portfolio._trades], axis=0)
         if as_of_date:
             self.as_of_date = pd.to_datetime(self.as_of_date)
         else:
@@ -278,7 +335,7 @@ class Portfolio:
         self._process_trades()
         self.update_price_data()
         self._assign_price_data()
-        self._update_snapshot()
+        self._refresh_snapshot()
 
     # TODO: Add ATH, ATL, 52WH, 52L, price_statistics, asset_allocation, info,
     # calendar, price targets
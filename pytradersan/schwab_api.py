@@ -1,9 +1,12 @@
 import json
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from pytradersan import constants
 
@@ -27,20 +30,31 @@ SCHWAB_API_TRANSACTION_TYPES = [
     "SMA_ADJUSTMENT",
 ]
 
+SCHWAB_API_MAX_WORKERS = 16
+
 API_COLUMN_MAPPER = {
     "tradeDate": "date",
     "accountNumber": "account",
     "netAmount": "amount",
 }
 
+# Shared session so that back to back API calls reuse pooled connections
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=SCHWAB_API_MAX_WORKERS,
+        pool_maxsize=SCHWAB_API_MAX_WORKERS,
+        max_retries=Retry(total=3, backoff_factor=0.3),
+    ),
+)
+
+_BASE_HEADERS = {"accept": "application/json"}
+
 
 def get_account_numbers(base_url, token):
-    headers = {
-        "accept": "application/json",
-        "Authorization": token,
-    }
     url = f"{base_url}/accountNumbers"
-    accounts = requests.get(url, headers=headers)
+    accounts = _SESSION.get(url, headers={**_BASE_HEADERS, "Authorization": token})
     accounts = json.loads(accounts.content)
     return accounts
 
@@ -57,17 +71,15 @@ def get_account_transactions(
         end_date (str): End date in 'YYYY-MM-DD'
         types (str): Transaction types. Default is 'TRADE'
     """
-    headers = {
-        "accept": "application/json",
-        "Authorization": token,
-    }
     url = f"{base_url}/{account_number}/transactions"
     params = {
         "startDate": start_date,
         "endDate": end_date,
         "types": types,
     }
-    transactions = requests.get(url, headers=headers, params=params)
+    transactions = _SESSION.get(
+        url, headers={**_BASE_HEADERS, "Authorization": token}, params=params
+    )
     transactions = json.loads(transactions.content)
     transactions = pd.json_normalize(transactions)
     if isinstance(transactions, dict):
@@ -93,26 +105,35 @@ def get_combined_transactions(base_url, token, start_date, end_date=pd.Timestamp
     ]  # need all n years including the start date
     dates = [date.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z" for date in dates]
     accounts = get_account_numbers(base_url, token)
+    requests_params = [
+        {
+            "base_url": base_url,
+            "token": token,
+            "account_number": account["hashValue"],
+            "start_date": start,
+            "end_date": end,
+            "types": transaction_type,
+        }
+        for account in accounts
+        for transaction_type in SCHWAB_API_TRANSACTION_TYPES
+        for start, end in zip(dates[:-1], dates[1:])
+    ]
+    # Requests are I/O bound, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=SCHWAB_API_MAX_WORKERS) as executor:
+        results = executor.map(
+            lambda params: get_account_transactions(**params), requests_params
+        )
+        frames = defaultdict(list)
+        for params, t in zip(requests_params, results):
+            frames[params["types"]].append(t)
+    # Combine transactions, once per transaction type. Windows without any
+    # transactions come back empty and are skipped
     transactions = defaultdict(pd.DataFrame)
-    for account in accounts:
-        for transaction_type in SCHWAB_API_TRANSACTION_TYPES:
-            # Get transactions for each account
-            txns = pd.DataFrame()
-            for start, end in zip(dates[:-1], dates[1:]):
-                t = get_account_transactions(
-                    base_url=base_url,
-                    token=token,
-                    account_number=account["hashValue"],
-                    start_date=start,
-                    end_date=end,
-                    types=transaction_type,
-                )
-                txns = pd.concat([txns, t], ignore_index=True)
-            # txns.drop_duplicates(inplace=True)
-            # Combine transactions
-            transactions[transaction_type] = pd.concat(
-                [transactions[transaction_type], txns], ignore_index=True
-            )
+    for transaction_type, txns in frames.items():
+        non_empty_txns = [t for t in txns if not t.empty]
+        transactions[transaction_type] = pd.concat(
+            non_empty_txns or txns, ignore_index=True
+        )
     return transactions
 
 
@@ -139,13 +160,17 @@ def parse_trades(transfer_items):
 
 
 def process_raw_trades(raw_trades):
-    trades = raw_trades.apply(lambda x: parse_trades(x["transferItems"]), axis=1).apply(
-        pd.Series
+    trades = pd.DataFrame.from_records(
+        [parse_trades(items) for items in raw_trades["transferItems"].tolist()],
+        index=raw_trades.index,
     )
     trades["price"] = trades["price"].astype(float)
     trades["quantity"] = trades["quantity"].astype(float)
-    trades["action"] = np.where(trades["quantity"] > 0, "BUY", "SELL")
-    trades = trades.join(raw_trades.copy(deep=True).drop(columns=["transferItems"]))
+    trades["action"] = pd.Categorical.from_codes(
+        (trades["quantity"].to_numpy() > 0).astype(np.int8),
+        categories=["SELL", "BUY"],
+    )
+    trades = trades.join(raw_trades.drop(columns=["transferItems"]))
     trades = trades.rename(columns=API_COLUMN_MAPPER)
     trades = trades[constants.TRANSACTIONS_STANDARD_COLS]
     trades["date"] = pd.to_datetime(trades["date"]).dt.date